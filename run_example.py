@@ -1,16 +1,17 @@
-import os
-import json
+import orjson
 import random
+import atexit
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass, field
-from dotenv import load_dotenv
-from openai import OpenAI
-from tool_registry import register_default_tools
-from tool_definitions import cleanup_memories
-
-load_dotenv()
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from tools.tool_registry import register_default_tools, TOOL_POOL
+from tools.openai_client import dumps, system_message, stream_chat_completion
+from tools.tool_definitions import cleanup_memories
+# Reflection (장기 기억 자동 저장)은 LangGraph 버전과 같은 파이프라인 사용
+from lang_graph.memory import memory_batcher
 
 # 툴 로드
 registry = register_default_tools()
@@ -96,55 +97,42 @@ tags=["long_term_goal", "agentic_ai_course"], importance=4 or 5.
 """
 
 
+SYSTEM_MESSAGE = system_message(SYSTEM_PROMPT)
+PROMPT_CACHE_KEY = "genai-agent-react"
 
-MEMORY_EXTRACTOR_PROMPT = """
-다음 대화를 보고 장기 기억으로 저장할 가치가 있는 정보가 있는지 판단하세요.
-
-저장해야 할 것:
-- 사용자 선호 (이름, 스타일)
-- 장기 목표, 프로젝트
-- 나중에 유용할 정보
+# 메모리 정리 등 유지보수 작업도 백그라운드로
+_bg_pool = ThreadPoolExecutor(max_workers=1)
+atexit.register(_bg_pool.shutdown, wait=True)
+_cleanup_lock = threading.Lock()
 
-저장하면 안 되는 것:
-- 일회성 정보 (오늘 점심)
-- 너무 상세한 로그
+def _cleanup_memories_locked():
+    """동시에 여러 cleanup이 돌지 않도록 lock"""
+    with _cleanup_lock:
+        cleanup_memories()
 
-JSON으로 응답:
-{
-    "should_write": true/false,
-    "memory_type": "profile" | "episodic" | "knowledge",
-    "importance": 1~5,
-    "content": "저장할 내용",
-    "tags": ["태그1", "태그2"]
-}
+# ===================
+# Tool 실행 + latency 기록
+# ===================
 
-저장할 거 없으면:
-{"should_write": false}
-"""
+# tool별 최근 실행 시간 (초) 히스토그램
+_tool_latencies: Dict[str, deque] = {}
+_latency_lock = threading.Lock()
 
-def extract_and_save_memory(question: str, answer: str):
-    snippet = f"User: {question}\nAssistant: {answer}"
-    
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": MEMORY_EXTRACTOR_PROMPT},
-            {"role": "user", "content": snippet}
-        ],
-        temperature=0
-    )
-    
-    decision = json.loads(response.choices[0].message.content)
-    
-    if decision.get("should_write"):
-        registry.call("write_memory", {
-            "content": decision["content"],
-            "memory_type": decision["memory_type"],
-            "importance": decision["importance"],
-            "tags": decision.get("tags", [])
-        })
-        print(f"[Memory Saved] {decision['content'][:50]}...")
+def timed_tool_call(tool_name: str, tool_args: Dict[str, Any]):
+    """tool 실행 후 (결과, 걸린 시간) 반환, 시간은 히스토그램에 기록"""
+    start = time.perf_counter()
+    result = registry.call(tool_name, tool_args)
+    elapsed = time.perf_counter() - start
     
+    with _latency_lock:
+        _tool_latencies.setdefault(tool_name, deque(maxlen=100)).append(elapsed)
+    return result, elapsed
+
+def tool_latency_p50(tool_name: str) -> float:
+    """최근 실행 시간의 중앙값 (기록 없으면 0)"""
+    with _latency_lock:
+        samples = sorted(_tool_latencies.get(tool_name, ()))
+    return samples[len(samples) // 2] if samples else 0.0
 
 # ===================
 # Agent Loop (Tool Calling)
@@ -153,7 +141,7 @@ def run_react_agent(question: str, max_cycles: int = 6, verbose: bool = True) ->
     traj = Trajectory(question=question)
     
     messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
+        SYSTEM_MESSAGE,
         {"role": "user", "content": question}
     ]
     
@@ -169,59 +157,84 @@ def run_react_agent(question: str, max_cycles: int = 6, verbose: bool = True) ->
         if verbose:
             print(f"\n--- Cycle {cycle + 1} ---")
         
-        # 1. LLM 호출 (tools 포함)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            tools=tools,
-            temperature=0
-        )
+        # 1. LLM 호출 (tools 포함, stream) - 답변 토큰은 바로 출력
+        # (tool_call 앞에 텍스트가 먼저 올 수도 있으므로 스트리밍 중에는 최종 답변인지 모름)
+        streamed = []
         
-        msg = response.choices[0].message
-        tool_calls = msg.tool_calls
+        def on_token(token):
+            if not streamed:
+                print("\n[Assistant]")
+            streamed.append(token)
+            print(token, end="", flush=True)
+        
+        content, tool_calls = stream_chat_completion(
+            messages, tools,
+            prompt_cache_key=PROMPT_CACHE_KEY,
+            on_token=on_token if verbose else None
+        )
+        if verbose and streamed:
+            print()
         
         # 2. Tool Call 없으면 → 최종 답변
         if not tool_calls:
-            traj.final_answer = msg.content or ""
-            if verbose:
+            traj.final_answer = content
+            if verbose and not streamed:
                 print(f"\n[Final Answer]\n{traj.final_answer}")
 
-            extract_and_save_memory(question, traj.final_answer)
+            memory_batcher.add(question, traj.final_answer)
 
-            if random.randint(1, 30) == 1:
-                cleanup_memories()
+            if random.random() < 1 / 30:
+                _bg_pool.submit(_cleanup_memories_locked)
 
             return traj
         
         # 3. assistant 메시지 추가 (tool_calls 포함)
-        messages.append(msg)
+        messages.append({
+            "role": "assistant",
+            "content": content or None,
+            "tool_calls": tool_calls
+        })
         
-        # 4. 각 Tool Call 실행
-        for tc in tool_calls:
-            tool_name = tc.function.name
-            tool_args = json.loads(tc.function.arguments or "{}")
-            
-            if verbose:
-                print(f"Tool Call: {tool_name}({tool_args})")
-            
-            # Tool 실행 (registry.call 사용)
-            result = registry.call(tool_name, tool_args)
-            observation = json.dumps(result, ensure_ascii=False)
+        # 4. Tool Call 병렬 실행 (서로 독립적인 I/O 작업)
+        parsed_calls = [
+            (tc, orjson.loads(tc["function"]["arguments"] or "{}"))
+            for tc in tool_calls
+        ]
+        
+        if verbose:
+            for tc, tool_args in parsed_calls:
+                print(f"Tool Call: {tc['function']['name']}({tool_args})")
+        
+        # 끝난 tool부터 바로 결과 처리 (LLM 재호출은 모든 결과가 모인 뒤)
+        observations = {}
+        futures = {
+            TOOL_POOL.submit(timed_tool_call, tc["function"]["name"], tool_args): tc
+            for tc, tool_args in parsed_calls
+        }
+        for future in as_completed(futures):
+            tc = futures[future]
+            result, elapsed = future.result()
+            observations[tc["id"]] = dumps(result)
             
             if verbose:
-                print(f"Observation: {observation[:300]}...")
+                name = tc["function"]["name"]
+                p50 = tool_latency_p50(name)
+                print(f"Observation [{name} {elapsed * 1000:.0f}ms, p50 {p50 * 1000:.0f}ms]: {observations[tc['id']][:300]}...")
+        
+        # 5. 원래 순서대로 Trace / Tool 결과 추가 (tool_call_id 정렬 유지)
+        for tc, tool_args in parsed_calls:
+            observation = observations[tc["id"]]
             
             # Trace 저장
             traj.traces.append(Trace(
-                tool_name=tool_name,
+                tool_name=tc["function"]["name"],
                 tool_args=tool_args,
                 observation=observation
             ))
             
-            # 5. Tool 결과를 messages에 추가
             messages.append({
                 "role": "tool",
-                "tool_call_id": tc.id,
+                "tool_call_id": tc["id"],
                 "content": observation
             })
     
@@ -1,17 +1,8 @@
-import sys
-from pathlib import Path
-
-# 경로 설정
-lang_graph_path = Path(__file__).resolve().parent
-tools_path = Path(__file__).resolve().parent.parent / "tools"
-sys.path.insert(0, str(lang_graph_path))
-sys.path.insert(0, str(tools_path))
-
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
-from state import AgentState
-from nodes import llm_node, tool_node
+from lang_graph.state import AgentState
+from lang_graph.nodes import llm_node, tool_node
 
 # ===================
 # 라우터
@@ -1,28 +1,27 @@
-import sys
-from pathlib import Path
+import atexit
+import threading
+import re
+import hashlib
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from openai import OpenAIError
+from pydantic import BaseModel, ValidationError, field_validator
 
-# 경로 설정
-tools_path = Path(__file__).resolve().parent.parent / "tools"
-sys.path.insert(0, str(tools_path))
+from tools.openai_client import get_client
+from tools.memory_buffer import get_memory_write_buffer
+from tools.batching import TimerBatcher
 
-import os
-import json
-from openai import OpenAI
-from dotenv import load_dotenv
-
-from tool_registry import register_default_tools
-
-load_dotenv()
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-registry = register_default_tools()
+# write_memory는 모아서 write_memory_batch로 한 번에 저장
+# (Reflection batcher보다 먼저 만들어야 종료 시 batcher flush 후에 flush됨)
+write_buffer = get_memory_write_buffer()
 
 # ===================
 # Reflection Prompt
 # ===================
 
 MEMORY_EXTRACTOR_PROMPT = """
-다음 대화를 보고 장기 기억으로 저장할 가치가 있는 정보가 있는지 판단하세요.
+아래에 번호가 매겨진 대화 목록이 있습니다.
+각 대화마다 장기 기억으로 저장할 가치가 있는 정보가 있는지 판단하세요.
 
 저장해야 할 것:
 - 사용자 선호 (이름, 스타일)
@@ -33,47 +32,170 @@ MEMORY_EXTRACTOR_PROMPT = """
 - 일회성 정보 (오늘 점심)
 - 너무 상세한 로그
 
-JSON으로 응답:
+JSON으로 응답 (대화 번호 순서대로, 대화마다 하나씩):
 {
-    "should_write": true/false,
-    "memory_type": "profile" | "episodic" | "knowledge",
-    "importance": 1~5,
-    "content": "저장할 내용",
-    "tags": ["태그1", "태그2"]
+    "decisions": [
+        {
+            "index": 1,
+            "should_write": true/false,
+            "memory_type": "profile" | "episodic" | "knowledge",
+            "importance": 1~5,
+            "content": "저장할 내용",
+            "tags": ["태그1", "태그2"]
+        }
+    ]
 }
 
-저장할 거 없으면:
-{"should_write": false}
+저장할 거 없는 대화는:
+{"index": 번호, "should_write": false}
 """
 
+# 판단 하나는 작은 JSON 객체 → 출력 길이 상한으로 decode 시간/비용 제한
+MAX_TOKENS_PER_DECISION = 128
+
+# Reflection 결과 스키마 (JSON mode 응답 검증용)
+class MemoryDecision(BaseModel):
+    index: Optional[int] = None
+    should_write: bool = False
+    memory_type: Optional[str] = None
+    importance: Optional[int] = None
+    content: Optional[str] = None
+    tags: List[str] = []
+    
+    @field_validator("importance")
+    @classmethod
+    def clamp_importance(cls, v: Optional[int]) -> Optional[int]:
+        # write_memory는 1~5만 허용 → 범위 밖 값은 배치 전체를 버리지 않고 보정
+        return None if v is None else min(max(v, 1), 5)
+
+class MemoryDecisionBatch(BaseModel):
+    decisions: List[MemoryDecision] = []
+
+# 저장할 만한 대화인지 빠르게 거르는 키워드
+MEMORY_KEYWORDS = (
+    "내 이름", "이름은", "선호", "목표", "기억", "프로젝트", "좋아", "싫어",
+    "앞으로", "항상", "주로", "팀플",
+    "name", "prefer", "remember", "goal",
+)
+# 키워드 전체를 하나의 alternation으로 컴파일 → 텍스트를 한 번만 스캔
+_MEMORY_KEYWORD_RE = re.compile("|".join(map(re.escape, MEMORY_KEYWORDS)), re.IGNORECASE)
+
+# 이미 판단한 대화 (snippet hash) → 같은 대화로 LLM 재호출 안 함
+_DECISION_CACHE_SIZE = 1024
+_seen_snippets: "OrderedDict[str, MemoryDecision]" = OrderedDict()
+_seen_lock = threading.Lock()
+
+def _worth_extracting(question: str, answer: str) -> bool:
+    """키워드도 없고 짧은 질문(잡담, 계산 등)은 LLM 호출 없이 건너뜀"""
+    if len(question) >= 40:
+        return True
+    return bool(_MEMORY_KEYWORD_RE.search(question) or _MEMORY_KEYWORD_RE.search(answer))
+
+def _snippet_hash(question: str, answer: str) -> str:
+    snippet = f"User: {question}\nAssistant: {answer}"
+    return hashlib.blake2b(snippet.encode(), digest_size=16).hexdigest()
+
+def _remember_decision(key: str, decision: MemoryDecision):
+    with _seen_lock:
+        _seen_snippets[key] = decision
+        _seen_snippets.move_to_end(key)
+        if len(_seen_snippets) > _DECISION_CACHE_SIZE:
+            _seen_snippets.popitem(last=False)
+
+def _request_decisions(snippets: str, count: int) -> List[MemoryDecision]:
+    """JSON mode로 판단 요청, API 오류나 검증 실패 시 한 번만 재시도"""
+    messages = [
+        {"role": "system", "content": MEMORY_EXTRACTOR_PROMPT},
+        {"role": "user", "content": snippets}
+    ]
+    
+    for attempt in range(2):
+        try:
+            response = get_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=messages,
+                response_format={"type": "json_object"},
+                temperature=0,
+                seed=42,
+                max_tokens=MAX_TOKENS_PER_DECISION * count
+            )
+        except OpenAIError as e:
+            # 타이머 스레드에서 실행되므로 예외를 올리면 배치가 조용히 사라짐 → 로그 후 한 번 재시도
+            retry = "재시도" if attempt == 0 else "포기"
+            print(f"[Memory] Reflection API 오류 ({count}개 대화), {retry}: {e!r}")
+            continue
+        raw = response.choices[0].message.content or ""
+        
+        try:
+            return MemoryDecisionBatch.model_validate_json(raw).decisions
+        except ValidationError as e:
+            print(f"[Memory] 잘못된 JSON 응답, 재시도: {e.error_count()}개 오류")
+            messages = messages + [
+                {"role": "assistant", "content": raw},
+                {"role": "user", "content": "Return ONLY valid JSON that matches the schema above."}
+            ]
+    
+    return []
+
 # ===================
 # 자동 메모리 저장 (Reflection)
 # ===================
 
-def extract_and_save_memory(question: str, answer: str):
-    """대화가 끝나면 자동으로 장기 기억 저장 여부 판단"""
+def extract_and_save_memories(items: List[Tuple[str, str]]):
+    """여러 대화를 한 번의 LLM 호출로 장기 기억 저장 여부 판단 (batch prompting)"""
     
-    snippet = f"User: {question}\nAssistant: {answer}"
+    # 키워드 pre-filter + 이미 판단한 대화 제외
+    pending = []
+    with _seen_lock:
+        for question, answer in items:
+            if not _worth_extracting(question, answer):
+                continue
+            key = _snippet_hash(question, answer)
+            if key in _seen_snippets:
+                _seen_snippets.move_to_end(key)
+                continue
+            pending.append((key, question, answer))
     
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": MEMORY_EXTRACTOR_PROMPT},
-            {"role": "user", "content": snippet}
-        ],
-        temperature=0
+    if not pending:
+        return
+    
+    snippets = "\n\n".join(
+        f"[{i}]\nUser: {question}\nAssistant: {answer}"
+        for i, (_, question, answer) in enumerate(pending, start=1)
     )
     
-    try:
-        decision = json.loads(response.choices[0].message.content)
+    decisions = _request_decisions(snippets, len(pending))
+    
+    for i, decision in enumerate(decisions, start=1):
+        index = decision.index or i
+        if 1 <= index <= len(pending):
+            _remember_decision(pending[index - 1][0], decision)
         
-        if decision.get("should_write"):
-            registry.call("write_memory", {
-                "content": decision["content"],
-                "memory_type": decision["memory_type"],
-                "importance": decision["importance"],
-                "tags": decision.get("tags", [])
-            })
-            print(f"[Memory Saved] {decision['content'][:50]}...")
-    except:
-        pass  # JSON 파싱 실패 시 무시
\ No newline at end of file
+        if decision.should_write and decision.content:
+            write_buffer.add(decision.model_dump(
+                include={"content", "memory_type", "importance", "tags"},
+                exclude_none=True
+            ))
+            print(f"[Memory Queued] {decision.content[:50]}...")
+
+def extract_and_save_memory(question: str, answer: str):
+    """대화가 끝나면 자동으로 장기 기억 저장 여부 판단"""
+    extract_and_save_memories([(question, answer)])
+
+# ===================
+# Reflection Batcher
+# ===================
+
+class MemoryExtractorBatcher(TimerBatcher):
+    """(질문, 답변)을 모아두었다가 max_items개 또는 max_wait초 idle 시 한 번에 Reflection"""
+    
+    def __init__(self, max_items: int = 6, max_wait: float = 2.0):
+        super().__init__(extract_and_save_memories, max_items=max_items, max_wait=max_wait)
+    
+    def add(self, question: str, answer: str):
+        """대화 추가 (바로 반환, 실제 LLM 호출은 타이머 스레드에서)"""
+        super().add((question, answer))
+
+# Reflection은 모아서 백그라운드로 실행 (최종 답변 반환을 막지 않음)
+memory_batcher = MemoryExtractorBatcher()
+atexit.register(memory_batcher.flush)
@@ -1,24 +1,15 @@
-import sys
-from pathlib import Path
-
-# 경로 설정
-lang_graph_path = Path(__file__).resolve().parent
-tools_path = Path(__file__).resolve().parent.parent / "tools"
-sys.path.insert(0, str(lang_graph_path))
-sys.path.insert(0, str(tools_path))
-
-import os
-import json
-from openai import OpenAI
-from dotenv import load_dotenv
+import orjson
+import threading
+from cachetools import LRUCache
 from langgraph.types import interrupt
+from langgraph.config import get_stream_writer
+from langchain_core.runnables import RunnableConfig
 
-from state import AgentState
-from tool_registry import register_default_tools
+from lang_graph.state import AgentState
+from tools.tool_registry import register_default_tools
+from tools.openai_client import dumps, system_message, get_client, stream_chat_completion
+from tools.tool_definitions import WriteMemoryInput, upsert_memory
 
-load_dotenv()
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 registry = register_default_tools()
 
 # ===================
@@ -41,6 +32,7 @@ You are an AI assistant that uses tools (functions), RAG, and memory.
 - rag_search: Search documents in ChromaDB
 - read_memory: Recall past information (장기 기억)
 - write_memory: Store important information (장기 기억)
+- write_memory_batch: Store several memories at once (장기 기억)
 
 # Memory usage guidelines
 - Call `read_memory` when user mentions "지난 번", "이전에", "저번에" etc.
@@ -52,102 +44,227 @@ You are an AI assistant that uses tools (functions), RAG, and memory.
 - 현재 대화 내역(messages)을 참고하여 "방금", "아까" 등의 질문에 답변하세요.
 """
 
+SYSTEM_MESSAGE = system_message(SYSTEM_PROMPT)
+PROMPT_CACHE_KEY = "genai-agent-langgraph"
+
+# 긴 세션 prompt 크기 제한 (sliding window + 요약)
+MAX_WINDOW_MESSAGES = 20  # 요약되지 않은 메시지가 이보다 많으면 압축
+KEEP_RECENT_MESSAGES = 12  # 압축 후에도 원문 그대로 남길 최근 메시지 수
+
+SUMMARY_PROMPT = """
+다음은 사용자와 AI 어시스턴트의 이전 대화입니다 (기존 요약이 있으면 함께 주어집니다).
+이후 대화에 필요한 내용만 300 토큰 이내의 한국어로 요약하세요.
+- 사용자 정보, 선호, 목표, 진행 중인 작업, 결정된 사항 위주로
+- 도구 결과는 핵심 사실만
+"""
+
 # 위험한 tool 목록 (사람 확인 필요)
-DANGEROUS_TOOLS = ["google_search", "write_memory"]
+DANGEROUS_TOOLS = ["google_search", "write_memory", "write_memory_batch"]
 
 # ===================
 # 메시지 변환 헬퍼
 # ===================
 
+_ROLE_MAP = {"human": "user", "ai": "assistant", "system": "system", "tool": "tool"}
+
+def _conv_tool_calls(tool_calls):
+    """LangChain tool_calls → OpenAI tool_calls"""
+    return [
+        {
+            "id": tc.get("id") or tc.get("tool_call_id", ""),
+            "type": "function",
+            "function": {
+                "name": tc.get("name", ""),
+                "arguments": tc.get("args", "") if isinstance(tc.get("args"), str) else dumps(tc.get("args", {}))
+            }
+        }
+        for tc in tool_calls
+    ]
+
+def _conv_human(m):
+    return {"role": "user", "content": m.content or ""}
+
+def _conv_system(m):
+    return {"role": "system", "content": m.content or ""}
+
+def _conv_ai(m):
+    msg_dict = {"role": "assistant", "content": m.content or ""}
+    if m.tool_calls:
+        msg_dict["tool_calls"] = _conv_tool_calls(m.tool_calls)
+    return msg_dict
+
+def _conv_tool(m):
+    return {"role": "tool", "content": m.content or "", "tool_call_id": m.tool_call_id}
+
+def _conv_other(m):
+    """표에 없는 타입 (Chunk 등 다른 메시지 클래스, 문자열)"""
+    if not hasattr(m, "type"):
+        return {"role": "user", "content": str(m)}
+    
+    msg_dict = {"role": _ROLE_MAP.get(m.type, m.type), "content": m.content or ""}
+    if getattr(m, "tool_calls", None):
+        msg_dict["tool_calls"] = _conv_tool_calls(m.tool_calls)
+    if getattr(m, "tool_call_id", None):
+        msg_dict["tool_call_id"] = m.tool_call_id
+    return msg_dict
+
+# 메시지 클래스 이름 → 변환 함수 (메시지마다 dict lookup 한 번)
+_CONVERTERS = {
+    "HumanMessage": _conv_human,
+    "AIMessage": _conv_ai,
+    "ToolMessage": _conv_tool,
+    "SystemMessage": _conv_system,
+    "dict": lambda m: m,
+}
+
 def convert_messages(messages):
     """LangGraph 메시지 객체를 OpenAI 형식 dict로 변환"""
-    converted = []
-    for m in messages:
-        if hasattr(m, "type"):  # HumanMessage, AIMessage 등
-            role_map = {"human": "user", "ai": "assistant", "system": "system", "tool": "tool"}
-            role = role_map.get(m.type, m.type)
-            msg_dict = {"role": role, "content": m.content or ""}
-            
-            # tool_calls가 있으면 추가 (AIMessage)
-            if hasattr(m, "tool_calls") and m.tool_calls:
-                msg_dict["tool_calls"] = [
-                    {
-                        "id": tc.get("id") or tc.get("tool_call_id", ""),
-                        "type": "function",
-                        "function": {
-                            "name": tc.get("name", ""),
-                            "arguments": tc.get("args", "") if isinstance(tc.get("args"), str) else json.dumps(tc.get("args", {}))
-                        }
-                    }
-                    for tc in m.tool_calls
-                ]
-            
-            # tool_call_id가 있으면 추가 (ToolMessage)
-            if hasattr(m, "tool_call_id") and m.tool_call_id:
-                msg_dict["tool_call_id"] = m.tool_call_id
-            
-            converted.append(msg_dict)
-        elif isinstance(m, dict):
-            converted.append(m)
-        else:
-            converted.append({"role": "user", "content": str(m)})
-    return converted
+    return [_CONVERTERS.get(type(m).__name__, _conv_other)(m) for m in messages]
+
+# ===================
+# thread별 변환 캐시
+# ===================
+
+class ConvertedHistory:
+    """thread별로 이미 OpenAI 형식으로 변환한 메시지 (매 턴 전체 재변환 방지)"""
+    
+    def __init__(self):
+        self.messages = []   # 변환된 dict 목록
+        self.count = 0       # 변환한 원본 메시지 수
+        self.last_id = None  # 마지막으로 변환한 원본 메시지 id
+        self.summary = ""    # 오래된 메시지 요약
+        self.summarized = 0  # 요약에 포함된 변환 메시지 수
+
+# thread_id -> ConvertedHistory (세션마다 thread가 새로 생기므로 크기 제한, miss 시 state에서 다시 변환)
+_history_cache = LRUCache(maxsize=256)
+_history_lock = threading.Lock()
+
+def get_converted_history(thread_id, messages):
+    """새로 추가된 메시지만 변환해서 캐시에 이어붙임"""
+    with _history_lock:
+        history = _history_cache.get(thread_id)
+    
+    # 메시지가 교체/삭제됐으면 (add_messages id 불일치) 처음부터 다시 변환
+    if (
+        history is None
+        or len(messages) < history.count
+        or (history.count and getattr(messages[history.count - 1], "id", None) != history.last_id)
+    ):
+        history = ConvertedHistory()
+        with _history_lock:
+            _history_cache[thread_id] = history
+    
+    if len(messages) > history.count:
+        history.messages.extend(convert_messages(messages[history.count:]))
+        history.count = len(messages)
+        history.last_id = getattr(messages[-1], "id", None)
+        if history.last_id is None:
+            # id 없는 메시지는 비교할 수 없으므로 캐시하지 않음
+            with _history_lock:
+                _history_cache.pop(thread_id, None)
+    
+    return history
+
+def summarize_history(history: ConvertedHistory, thread_id: str):
+    """최근 메시지만 남기고 나머지는 요약으로 압축 (요약은 장기 기억에도 저장)"""
+    cut = len(history.messages) - KEEP_RECENT_MESSAGES
+    
+    # tool 메시지는 앞의 assistant(tool_calls) 메시지와 떨어지면 안 됨
+    while cut > history.summarized and history.messages[cut]["role"] == "tool":
+        cut -= 1
+    if cut <= history.summarized:
+        return
+    
+    transcript = "\n".join(
+        f"{m['role']}: {str(m.get('content') or '')[:500]}"
+        for m in history.messages[history.summarized:cut]
+        if m.get("content")
+    )
+    if history.summary:
+        transcript = f"[기존 요약]\n{history.summary}\n\n[이어진 대화]\n{transcript}"
+    
+    response = get_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript}
+        ],
+        temperature=0,
+        max_tokens=400
+    )
+    
+    history.summary = response.choices[0].message.content or history.summary
+    history.summarized = cut
+    print(f"[History Summarized] {cut}개 메시지 압축")
+    
+    # 다른 thread에서도 참고할 수 있도록 장기 기억에 저장
+    # (요약은 누적이므로 thread당 하나의 id로 덮어씀 → 거의 같은 요약이 쌓이지 않음)
+    try:
+        upsert_memory(f"summary_{thread_id}", WriteMemoryInput(
+            content=history.summary,
+            memory_type="episodic",
+            importance=2,
+            tags=["conversation_summary"]
+        ))
+    except Exception as e:
+        print(f"[History Summary Save Error] {e!r}")
 
 # ===================
 # LLM Node
 # ===================
 
-def llm_node(state: AgentState) -> dict:
+def llm_node(state: AgentState, config: RunnableConfig) -> dict:
     """LLM 호출하는 노드"""
     
-    messages = list(state["messages"])
+    thread_id = config["configurable"]["thread_id"]
+    
+    # 메시지 변환 (새로 추가된 메시지만)
+    history = get_converted_history(thread_id, state["messages"])
     
-    # 메시지 변환
-    converted_messages = convert_messages(messages)
+    # 오래된 메시지는 요약으로 압축 (prompt 크기를 window 크기로 제한)
+    if len(history.messages) - history.summarized > MAX_WINDOW_MESSAGES:
+        try:
+            summarize_history(history, thread_id)
+        except Exception as e:
+            # 요약은 부가 기능 → 실패해도 history.summarized 그대로, 요약 안 된 window 전체로 진행
+            print(f"[History Summarize Error] {e!r}")
     
-    # system prompt 확인
-    has_system = converted_messages and converted_messages[0].get("role") == "system"
-    if not has_system:
-        converted_messages = [{"role": "system", "content": SYSTEM_PROMPT}] + converted_messages
+    # system prompt (고정 prefix) → 요약 → 최근 메시지
+    converted_messages = [SYSTEM_MESSAGE]
+    if history.summary:
+        converted_messages.append({"role": "system", "content": f"이전 대화 요약:\n{history.summary}"})
+    converted_messages.extend(history.messages[history.summarized:])
     
     # OpenAI Tool Spec
     tools = registry.list_openai_tools()
     
-    # LLM 호출
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=converted_messages,
-        tools=tools,
-        temperature=0
+    # LLM 호출 (stream) - 답변 토큰은 graph.stream(stream_mode="custom")으로 바로 전달
+    writer = get_stream_writer()
+    content, tool_calls = stream_chat_completion(
+        converted_messages, tools,
+        prompt_cache_key=PROMPT_CACHE_KEY,
+        on_token=lambda token: writer({"token": token})
     )
     
-    msg = response.choices[0].message
-    
     # tool_calls 있는지 확인
-    if msg.tool_calls:
+    if tool_calls:
         tool_calls_data = []
-        for tc in msg.tool_calls:
+        for tc in tool_calls:
+            # arguments는 여기서 한 번만 파싱하고 message와 tool_calls state가 같은 dict를 공유
+            # (dict이면 add_messages가 AIMessage로 바꿀 때 JSON을 다시 파싱하지 않음)
+            args = orjson.loads(tc["function"]["arguments"] or "{}")
+            tc["function"]["arguments"] = args
             tool_calls_data.append({
-                "id": tc.id,
-                "name": tc.function.name,
-                "arguments": json.loads(tc.function.arguments or "{}")
+                "id": tc["id"],
+                "name": tc["function"]["name"],
+                "arguments": args
             })
         
         # OpenAI 메시지 → dict 변환
         msg_dict = {
             "role": "assistant",
-            "content": msg.content or "",
-            "tool_calls": [
-                {
-                    "id": tc.id,
-                    "type": "function",
-                    "function": {
-                        "name": tc.function.name,
-                        "arguments": tc.function.arguments
-                    }
-                }
-                for tc in msg.tool_calls
-            ]
+            "content": content,
+            "tool_calls": tool_calls
         }
         
         return {
@@ -158,7 +275,7 @@ def llm_node(state: AgentState) -> dict:
         # OpenAI 메시지 → dict 변환
         msg_dict = {
             "role": "assistant",
-            "content": msg.content or ""
+            "content": content
         }
         
         return {
@@ -178,31 +295,45 @@ def tool_node(state: AgentState) -> dict:
     if not tool_calls:
         return {"messages": [], "tool_calls": None}
     
-    tool_messages = []
+    # 1. 위험한 tool은 먼저 순서대로 사람 확인 (interrupt는 병렬 실행 불가)
+    approved = []
+    cancelled = set()
     
     for tc in tool_calls:
-        tool_name = tc["name"]
-        tool_args = tc["arguments"]
-        tool_id = tc["id"]
-        
-        # 위험한 tool이면 사람 확인
-        if tool_name in DANGEROUS_TOOLS:
-            confirm = interrupt(f"'{tool_name}' 실행할까요? 인자: {tool_args}")
+        if tc["name"] in DANGEROUS_TOOLS:
+            confirm = interrupt(f"'{tc['name']}' 실행할까요? 인자: {tc['arguments']}")
             
             if confirm != "y":
-                tool_messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_id,
-                    "content": json.dumps({"status": "cancelled", "reason": "사용자가 취소함"})
-                })
+                cancelled.add(tc["id"])
                 continue
         
-        print(f"[Tool 실행] {tool_name}({tool_args})")
+        approved.append(tc)
+    
+    # 2. 승인된 tool 병렬 실행
+    observations = {}
+    if approved:
+        for tc in approved:
+            print(f"[Tool 실행] {tc['name']}({tc['arguments']})")
+        
+        futures = [registry.submit(tc["name"], tc["arguments"]) for tc in approved]
+        for tc, future in zip(approved, futures):
+            observations[tc["id"]] = dumps(future.result())
+    
+    # 3. 원래 순서대로 Tool 메시지 생성 (tool_call_id 정렬 유지)
+    tool_messages = []
+    
+    for tc in tool_calls:
+        tool_id = tc["id"]
         
-        # Tool 실행
-        result = registry.call(tool_name, tool_args)
-        observation = json.dumps(result, ensure_ascii=False)
+        if tool_id in cancelled:
+            tool_messages.append({
+                "role": "tool",
+                "tool_call_id": tool_id,
+                "content": dumps({"status": "cancelled", "reason": "사용자가 취소함"})
+            })
+            continue
         
+        observation = observations[tool_id]
         print(f"[Tool 결과] {observation[:200]}...")
         
         tool_messages.append({
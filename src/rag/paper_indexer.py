@@ -57,7 +57,14 @@ def ingest_pdfs():
         documents=splits,
         embedding=embeddings,
         persist_directory=str(DB_PATH), 
-        collection_name="paper_rag_db"
+        collection_name="paper_rag_db",
+        # HNSW 파라미터 (tools.tool_definitions.RAG_HNSW_CONFIG 와 동일)
+        collection_metadata={
+            "hnsw:space": "cosine",
+            "hnsw:M": 32,
+            "hnsw:construction_ef": 128,
+            "hnsw:search_ef": 64,
+        },
     )
     
     print("완료! RAG 데이터베이스가 성공적으로 구축되었습니다.")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+from typing import Any, Callable, List, Optional
+import threading
+
+
+class TimerBatcher:
+    """Collect items and hand them to handler(items) in a single call.
+
+    A batch is flushed once max_items are queued or max_wait seconds pass
+    without a new item. The handler runs on a timer thread, so add() never blocks.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], None], max_items: int, max_wait: float):
+        self.handler = handler
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self._items: List[Any] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, item: Any) -> None:
+        with self._lock:
+            self._items.append(item)
+            if self._timer is not None:
+                self._timer.cancel()
+            delay = 0 if len(self._items) >= self.max_items else self.max_wait
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            items, self._items = self._items, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if items:
+            self.handler(items)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+import atexit
+
+from pydantic import ValidationError
+
+from tools.batching import TimerBatcher
+from tools.singleton import lazy_singleton
+from tools.tool_registry import ToolRegistry, register_default_tools
+from tools.tool_definitions import WriteMemoryInput
+
+
+class MemoryWriteBuffer(TimerBatcher):
+    """Write-behind buffer that stores memories via one write_memory_batch call.
+
+    Items are flushed once max_items are queued or max_wait seconds pass
+    without a new item, so N memories cost one embedding + one insert.
+    """
+
+    def __init__(self, registry: ToolRegistry, max_items: int = 8, max_wait: float = 0.5):
+        super().__init__(self._write_batch, max_items=max_items, max_wait=max_wait)
+        self.registry = registry
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """Queue one write_memory payload (content, memory_type, importance, tags).
+
+        Items are validated here so one bad item is dropped on its own instead
+        of failing the whole write_memory_batch call.
+        """
+        try:
+            validated = WriteMemoryInput.model_validate(item)
+        except ValidationError as e:
+            print(f"[Memory Item Dropped] {e.error_count()}개 오류: {item}")
+            return
+        super().add(validated.model_dump())
+
+    def _write_batch(self, items: List[Dict[str, Any]]) -> None:
+        result = self.registry.call("write_memory_batch", {"items": items})
+        if "error" not in result:
+            print(f"[Memory Batch Saved] {result['count']}개")
+            return
+
+        # batch add 실패 -> 한 건씩 다시 저장해서 실패한 항목만 잃도록
+        print(f"[Memory Batch Error] {result}, {len(items)}개 개별 재시도")
+        for item in items:
+            single = self.registry.call("write_memory_batch", {"items": [item]})
+            if "error" in single:
+                print(f"[Memory Write Failed] {single}: {item.get('content', '')[:50]}")
+
+
+@lazy_singleton
+def get_memory_write_buffer() -> MemoryWriteBuffer:
+    """Return the shared write buffer (flushed at interpreter exit)."""
+    buffer = MemoryWriteBuffer(register_default_tools())
+    atexit.register(buffer.flush)
+    return buffer
@@ -0,0 +1,86 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+
+import httpx
+import orjson
+from dotenv import load_dotenv
+from openai import OpenAI, DefaultHttpxClient
+
+from tools.singleton import lazy_singleton
+
+
+def system_message(prompt: str) -> Dict[str, str]:
+    """Build the fixed system message (same prefix bytes every call, so OpenAI prompt caching applies)."""
+    return {"role": "system", "content": prompt.strip()}
+
+
+def dumps(obj: Any) -> str:
+    """Serialize tool results/arguments with orjson (UTF-8 kept as-is, like ensure_ascii=False)."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+@lazy_singleton
+def get_client() -> OpenAI:
+    """Return the shared OpenAI client (created lazily on first use)."""
+    load_dotenv()
+    return OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        # keep-alive 커넥션 풀 재사용 (호출마다 TCP/TLS handshake 방지, HTTP/2 다중화)
+        http_client=DefaultHttpxClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20)
+        )
+    )
+
+
+def stream_chat_completion(
+    messages: List[Dict[str, Any]],
+    tools: List[Dict[str, Any]],
+    prompt_cache_key: str,
+    on_token: Optional[Callable[[str], None]] = None,
+    model: str = "gpt-4o-mini",
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Call chat.completions with stream=True and return (content, tool_calls).
+
+    Answer tokens are passed to on_token as they arrive (until the first
+    tool_call delta). tool_call arguments arrive split across deltas, so they
+    are accumulated and returned once the stream ends.
+    """
+    stream = get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        tools=tools,
+        temperature=0,
+        stream=True,
+        prompt_cache_key=prompt_cache_key
+    )
+
+    content_parts = []
+    tool_calls: Dict[int, Dict[str, Any]] = {}  # delta index -> OpenAI tool_call dict
+
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+
+        if delta.content:
+            content_parts.append(delta.content)
+            if on_token and not tool_calls:
+                on_token(delta.content)
+
+        for tc in delta.tool_calls or []:
+            # arguments는 "{}"가 아니라 ""로 시작해야 쪼개진 delta를 이어붙일 수 있음
+            call = tool_calls.setdefault(tc.index, {
+                "id": "",
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function and tc.function.name:
+                call["function"]["name"] = tc.function.name
+            if tc.function and tc.function.arguments:
+                call["function"]["arguments"] += tc.function.arguments
+
+    return "".join(content_parts), [tool_calls[i] for i in sorted(tool_calls)]
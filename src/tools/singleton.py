@@ -0,0 +1,25 @@
+from __future__ import annotations
+from typing import Callable, List, TypeVar
+import functools
+import threading
+
+T = TypeVar("T")
+
+
+def lazy_singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """Create the value on first call only, under a double-checked lock.
+
+    Unlike lru_cache(maxsize=1), concurrent first calls (tool pool, timer
+    threads, graph thread) cannot build the value twice.
+    """
+    lock = threading.Lock()
+    instance: List[T] = []
+
+    @functools.wraps(factory)
+    def get() -> T:
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+    return get
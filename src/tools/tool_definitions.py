@@ -1,18 +1,253 @@
 from __future__ import annotations
-from typing import Any, Dict, Callable, Type, List
+from typing import Any, Dict, Callable, Type, List, Optional
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from dateutil import tz
 from chromadb.config import Settings
-from sentence_transformers import CrossEncoder
+from pathlib import Path
+from contextlib import contextmanager
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import os
+import itertools
+import operator
+import functools
+import hashlib
+import threading
 import chromadb
+import numpy as np
+import orjson
+from cachetools import LRUCache, TTLCache, cached
 
-reranker = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
-chromadb_client = chromadb.PersistentClient(path="./chroma_db")
-collection = chromadb_client.get_or_create_collection(name="paper_rag_db")
-memory_collection = chromadb_client.get_or_create_collection(name="memory_db")
+from tools.singleton import lazy_singleton
+
+# Reranker
+# -----------------
+
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANKER_ONNX_DIR = Path("./onnx_reranker")
+
+class OnnxCrossEncoder:
+    """INT8-quantized ONNX Runtime cross-encoder; score() returns one logit per (query, document) pair."""
+
+    def __init__(self, model_name: str = RERANKER_MODEL, cache_dir: Path = RERANKER_ONNX_DIR):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = cache_dir / "model_quantized.onnx"
+        if not model_path.exists():
+            self._export_quantized(model_name, cache_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.intra_op_num_threads = os.cpu_count() or 1
+        self.session = ort.InferenceSession(str(model_path), sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @staticmethod
+    def _export_quantized(model_name: str, cache_dir: Path) -> None:
+        """One-time ONNX export + dynamic INT8 quantization (VNNI dot-product kernels)."""
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        model.save_pretrained(cache_dir)
+        quantizer = ORTQuantizer.from_pretrained(model)
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=cache_dir, quantization_config=qconfig)
+
+    def score(self, queries, documents, max_length: int = 512):
+        enc = self.tokenizer(queries, documents, padding=True, truncation=True, max_length=max_length, return_tensors="np")
+        inputs = {name: value for name, value in enc.items() if name in self.input_names}
+        return self.session.run(None, inputs)[0][:, 0]
+
+# Lazy singletons: heavy models / DB handles load on first use, not at import
+# -----------------
+
+@lazy_singleton
+def _reranker():
+    try:
+        return OnnxCrossEncoder()
+    except Exception as e:
+        # optimum / onnxruntime 미설치, export/quantize 실패 (네트워크, 버전 불일치 등)
+        # -> PyTorch CrossEncoder (매 호출마다 export 재시도하지 않도록 여기서 확정)
+        print(f"[Reranker] ONNX reranker unavailable, falling back to CrossEncoder: {e!r}")
+        import torch
+        from sentence_transformers import CrossEncoder
+        if torch.cuda.is_available():
+            model = CrossEncoder(RERANKER_MODEL, device="cuda")
+            model.model.half()  # FP16 추론
+        else:
+            # 작은 배치(n<=50)는 스레드가 많을수록 경합만 늘어남
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // 2))
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass  # 이미 병렬 작업이 시작된 뒤에는 변경 불가
+            model = CrossEncoder(RERANKER_MODEL, device="cpu")
+        model.model.eval()
+        model.model.requires_grad_(False)
+        return model
+
+# msmarco cross-encoder 는 256 토큰 이후 품질 차이 거의 없음 (attention 비용 O(L^2))
+RERANK_MAX_LENGTH = 256
+
+def _rerank_scores(query: str, documents: List[str]) -> np.ndarray:
+    """Score (query, doc) pairs with one tokenizer call + one forward pass."""
+    reranker = _reranker()
+    queries = [query] * len(documents)
+    if isinstance(reranker, OnnxCrossEncoder):
+        return np.asarray(reranker.score(queries, documents, max_length=RERANK_MAX_LENGTH), dtype=np.float32)
+    
+    # PyTorch CrossEncoder: predict() 의 Python 배칭을 건너뛰고 모델을 직접 호출
+    import torch
+    enc = reranker.tokenizer(
+        queries, documents,
+        padding=True, truncation=True, max_length=RERANK_MAX_LENGTH, return_tensors="pt",
+    ).to(reranker.model.device)
+    with torch.inference_mode():
+        logits = reranker.model(**enc).logits[:, 0]
+    return logits.float().cpu().numpy()
+
+@lazy_singleton
+def _chroma():
+    return chromadb.PersistentClient(path="./chroma_db")
+
+# HNSW 설정 (새로 생성되는 paper_rag_db 에만 적용, ef_search 는 런타임 변경 가능)
+RAG_HNSW_CONFIG = {
+    "space": "cosine",
+    "max_neighbors": 32,
+    "ef_construction": 128,
+    "ef_search": 64,
+}
+
+@lazy_singleton
+def _collection():
+    return _chroma().get_or_create_collection(
+        name="paper_rag_db",
+        configuration={"hnsw": RAG_HNSW_CONFIG},
+    )
+
+class _ReadWriteLock:
+    """여러 reader 동시 허용, writer 는 단독 (대기 중인 writer 가 있으면 새 reader 는 대기)"""
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+    
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+# ef_search override 는 컬렉션 전체 설정 -> modify -> query -> 원래 값 복원을 write lock 안에서 수행.
+# override 없는 query 는 read lock 만 잡으므로 서로 기다리지 않고, override 중인 설정으로 검색하지도 않음.
+# 주의: lock 은 이 프로세스 안에서만 유효 (./chroma_db 를 공유하는 다른 프로세스는 임시 값을 볼 수 있음),
+#       modify 와 복원 사이에 프로세스가 죽으면 override 값이 컬렉션에 그대로 남음.
+_ef_search_lock = _ReadWriteLock()
+
+@lazy_singleton
+def _baseline_ef_search() -> int:
+    """컬렉션에 저장된 ef_search (기존 컬렉션은 생성 시 설정이 다를 수 있음)"""
+    try:
+        configuration = _collection().configuration or {}
+        return int((configuration.get("hnsw") or {}).get("ef_search") or RAG_HNSW_CONFIG["ef_search"])
+    except Exception:
+        return RAG_HNSW_CONFIG["ef_search"]
+
+def _query_rag(query_embedding, n_results: int, ef_search: Optional[int]) -> Dict[str, Any]:
+    collection = _collection()
+    baseline = _baseline_ef_search()
+    query = functools.partial(
+        collection.query,
+        query_embeddings=[query_embedding],
+        n_results=n_results,
+        include=["documents", "metadatas"],
+    )
+    
+    if ef_search is None or ef_search == baseline:
+        with _ef_search_lock.read():
+            return query()
+    
+    with _ef_search_lock.write():
+        collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+        try:
+            return query()
+        finally:
+            collection.modify(configuration={"hnsw": {"ef_search": baseline}})
+
+@lazy_singleton
+def _memory_collection():
+    return _chroma().get_or_create_collection(name="memory_db")
+
+# Query embedding cache: 같은 쿼리는 한 번만 임베딩 (에이전트 재시도 / 반복 질문)
+# -----------------
+
+@lazy_singleton
+def _embedding_function():
+    # 컬렉션이 문서를 저장할 때 쓰는 것과 같은 기본 임베딩 함수
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
+
+_query_embed_cache = LRUCache(maxsize=4096)
+
+@cached(
+    cache=_query_embed_cache,
+    key=lambda query: hashlib.sha256(query.encode("utf-8")).hexdigest(),
+    lock=threading.Lock(),
+)
+def _embed_query(query: str):
+    return _embedding_function()([query])[0]
+
+# Result caches: 같은 검색 결과를 TTL 동안 재사용 (에러는 캐시하지 않음)
+# -----------------
+
+_rag_cache = TTLCache(maxsize=256, ttl=300)
+_mem_cache = TTLCache(maxsize=256, ttl=60)
+_result_cache_lock = threading.Lock()
+
+def _cache_get(cache: TTLCache, key: tuple) -> Optional[Dict[str, Any]]:
+    with _result_cache_lock:
+        return cache.get(key)
+
+def _cache_put(cache: TTLCache, key: tuple, value: Dict[str, Any]) -> Dict[str, Any]:
+    with _result_cache_lock:
+        cache[key] = value
+    return value
+
+def _invalidate_memory_cache() -> None:
+    """메모리 저장/삭제 후 read_memory 결과가 바로 반영되도록 캐시 비움"""
+    with _result_cache_lock:
+        _mem_cache.clear()
 
 # Tool Definitions
 # -----------------
@@ -20,9 +255,13 @@ memory_collection = chromadb_client.get_or_create_collection(name="memory_db")
 class GetTimeInput(BaseModel):
     timezone: str = Field(..., description="IANA timezone name, e.g., 'Asia/Seoul'")
 
+@functools.lru_cache(maxsize=64)
+def _tz(name: str):
+    return tz.gettz(name)
+
 def get_time(input: GetTimeInput) -> Dict[str, Any]:
     try:
-        target_tz = tz.gettz(input.timezone)
+        target_tz = _tz(input.timezone)
         if target_tz is None:
             raise ValueError(f"Invalid timezone: {input.timezone}")
         now = datetime.now(tz=target_tz)
@@ -40,24 +279,37 @@ class CalculaterInput(BaseModel):
     num2: float = Field(..., description="The second number")
     op: str = Field(..., description="The operation to perform: add, subtract, multiply, divide")
 
+_OPS: Dict[str, Callable[[float, float], float]] = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": operator.truediv,
+}
+
 def calculate(input: CalculaterInput) -> Dict[str, Any]:
     try:
-        if input.op == "add":
-            result = input.num1 + input.num2
-        elif input.op == "subtract":
-            result = input.num1 - input.num2
-        elif input.op == "multiply":
-            result = input.num1 * input.num2
-        elif input.op == "divide":
-            if input.num2 == 0:
-                raise ValueError("Division by zero is not allowed.")
-            result = input.num1 / input.num2
-        else:
+        fn = _OPS.get(input.op)
+        if fn is None:
             raise ValueError(f"Invalid operation: {input.op}")
-        return {"result": result}
+        if input.op == "divide" and input.num2 == 0:
+            raise ValueError("Division by zero is not allowed.")
+        return {"result": fn(input.num1, input.num2)}
     except Exception as e:
         return {"error": str(e)}
     
+# Google Search 용 HTTP 세션 (keep-alive 커넥션 재사용 + 429/5xx 재시도)
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+    ),
+))
+
 class GoogleSearchInput(BaseModel):
     query: str = Field(..., description="The search query string")
     num_results: int = Field(5, ge=1, le=10, description="Number of search results to return")
@@ -84,9 +336,9 @@ def google_search(input: GoogleSearchInput) -> Dict[str, Any]:
             "q": input.query,
             "num": input.num_results
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = _http.get(url, params=params, timeout=(3.05, 10))
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         results = []
         for item in data.get("items", []):
@@ -104,12 +356,22 @@ def google_search(input: GoogleSearchInput) -> Dict[str, Any]:
 class RAGSearchInput(BaseModel):
     query: str = Field(..., description="The search query string")
     n_results: int = Field(5, ge=1, le=20, description="Number of search results to return")
+    candidate_multiplier: int = Field(4, ge=1, le=10, description="Fetch n_results * multiplier candidates before reranking")
+    ef_search: Optional[int] = Field(None, ge=1, le=512, description="Optional HNSW ef_search override (recall/latency trade-off); slower, serializes with other searches")
+
+# 리랭커에 넘기는 후보 수 상한 (최악의 경우 지연 시간 고정)
+MAX_RERANK_CANDIDATES = 50
 
 def rag_search(input: RAGSearchInput) -> Dict[str, Any]:
+    cache_key = (input.query, input.n_results, input.candidate_multiplier, input.ef_search)
+    cached_result = _cache_get(_rag_cache, cache_key)
+    if cached_result is not None:
+        return cached_result
     try:
-        results = collection.query(
-            query_texts=[input.query],
-            n_results=input.n_results,
+        results = _query_rag(
+            _embed_query(input.query),
+            n_results=min(input.n_results * input.candidate_multiplier, MAX_RERANK_CANDIDATES),
+            ef_search=input.ef_search,
         )
         
         documents = results.get("documents", [[]])[0]
@@ -119,46 +381,64 @@ def rag_search(input: RAGSearchInput) -> Dict[str, Any]:
             return {"results": [], "total": 0}
         
         # 2. 리랭킹 (쿼리 + 문서 pair)
-        pairs = [[input.query, doc] for doc in documents]
-        scores = reranker.predict(pairs)
+        scores = _rerank_scores(input.query, documents)
         
-        # 3. 점수순 정렬 후 top_k개만
-        ranked = sorted(
-            zip(documents, metadatas, scores),
-            key=lambda x: x[2],
-            reverse=True
-        )[:input.n_results]
+        # 3. top_k개만 부분 선택 (argpartition) 후 그 안에서만 정렬
+        k = min(input.n_results, len(scores))
+        idx = np.argpartition(-scores, kth=k - 1)[:k]
+        top = idx[np.argsort(-scores[idx], kind="stable")]
         
-        # 4. 결과 포맷팅
-        results_list = []
-        for i, (doc, metadata, score) in enumerate(ranked):
-            results_list.append({
-                "rank": i + 1,
-                "content": doc,
-                "metadata": metadata if metadata else {},
-                "score": round(float(score), 4)
-            })
+        # 4. 결과 포맷팅 (선택된 인덱스만 한 번 순회)
+        results_list = [
+            {
+                "rank": rank,
+                "content": documents[i],
+                "metadata": metadatas[i] or {},
+                "score": round(float(scores[i]), 4),
+            }
+            for rank, i in enumerate(top, start=1)
+        ]
         
-        return {"results": results_list, "source": "chroma_rag"}
+        return _cache_put(_rag_cache, cache_key, {"results": results_list, "source": "chroma_rag"})
     except Exception as e:
         return {"error": str(e)}
     
+# Tags: ChromaDB 메타데이터는 list 지원 안 함 -> "|" 구분 문자열 + JSON blob 로 저장
+def _encode_tags(tags: List[str]) -> Dict[str, str]:
+    return {
+        "tags": "|".join(tags),
+        "tags_blob": orjson.dumps(tags).decode(),
+    }
+
+def _decode_tags(metadata: Dict[str, Any]) -> List[str]:
+    blob = metadata.get("tags_blob")
+    if blob:
+        return orjson.loads(blob)
+    # tags_blob 이 없는 이전 레코드는 "," 로 join 되어 있음
+    legacy = metadata.get("tags")
+    return legacy.split(",") if legacy else []
+
 class ReadMemoryInput(BaseModel):
     query: str = Field(..., description="검색할 키워드나 질문")
     memory_type: str = Field("all", description="메모리 타입: 'all', 'profile', 'episodic', 'knowledge'")
     top_k: int = Field(5, ge=1, le=10, description="반환할 결과 수")
 
 def read_memory(input: ReadMemoryInput) -> Dict[str, Any]:
+    cache_key = (input.query, input.memory_type, input.top_k)
+    cached_result = _cache_get(_mem_cache, cache_key)
+    if cached_result is not None:
+        return cached_result
     try:
         # 검색 조건 설정
         where_filter = None
         if input.memory_type != "all":
             where_filter = {"memory_type": input.memory_type}
         
-        results = memory_collection.query(
-            query_texts=[input.query],
+        results = _memory_collection().query(
+            query_embeddings=[_embed_query(input.query)],
             n_results=input.top_k,
-            where=where_filter
+            where=where_filter,
+            include=["documents", "metadatas"],
         )
         
         documents = results.get("documents", [[]])[0]
@@ -167,56 +447,167 @@ def read_memory(input: ReadMemoryInput) -> Dict[str, Any]:
         if not documents:
             return {"results": [], "message": "관련 기억을 찾지 못했습니다."}
         
-        results_list = []
-        for doc, metadata in zip(documents, metadatas):
-            results_list.append({
+        results_list = [
+            {
                 "content": doc,
                 "memory_type": metadata.get("memory_type", "unknown"),
                 "importance": metadata.get("importance", 0),
-                "tags": metadata.get("tags", []),
-                "created_at": metadata.get("created_at", "unknown")
-            })
+                "tags": _decode_tags(metadata),
+                "created_at": metadata.get("created_at", "unknown"),
+            }
+            for doc, metadata in zip(documents, metadatas)
+        ]
         
-        return {"results": results_list, "count": len(results_list)}
+        return _cache_put(_mem_cache, cache_key, {"results": results_list, "count": len(results_list)})
     except Exception as e:
         return {"error": str(e)}
     
+# 레코드당 저장 크기 상한 (Chroma 직렬화 비용 제한)
+MAX_MEMORY_CONTENT_BYTES = 8192
+MAX_TAGS = 16
+MAX_TAG_LENGTH = 64
+
 class WriteMemoryInput(BaseModel):
     content: str = Field(..., description="저장할 내용")
     memory_type: str = Field("episodic", description="메모리 타입: 'profile', 'episodic', 'knowledge'")
     importance: int = Field(3, ge=1, le=5, description="중요도 1(낮음) ~ 5(높음)")
     tags: List[str] = Field(default=[], description="태그 목록")
+    flush: bool = Field(False, exclude=True, description="True면 바로 저장하고 결과(id 또는 오류)를 반환. 저장 직후 read_memory로 확인할 때 사용")
+
+    @field_validator("content")
+    @classmethod
+    def truncate_content(cls, v: str) -> str:
+        encoded = v.encode("utf-8")
+        if len(encoded) <= MAX_MEMORY_CONTENT_BYTES:
+            return v
+        # "…" 는 UTF-8 3바이트, 잘린 멀티바이트 문자는 버림
+        return encoded[:MAX_MEMORY_CONTENT_BYTES - 3].decode("utf-8", errors="ignore") + "…"
+
+    @field_validator("tags")
+    @classmethod
+    def cap_tags(cls, v: List[str]) -> List[str]:
+        return [tag[:MAX_TAG_LENGTH] for tag in v[:MAX_TAGS]]
+
+def _lean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """ChromaDB 메타데이터는 primitive 값만 허용 -> 그 외 값은 문자열로 변환"""
+    return {
+        key: value if isinstance(value, (str, int, float, bool)) else str(value)
+        for key, value in metadata.items()
+    }
+
+# memory id 순번 (같은 시각에 저장된 메모리끼리 id 가 겹치지 않도록)
+_memory_seq = itertools.count()
 
 def write_memory(input: WriteMemoryInput) -> Dict[str, Any]:
     try:
-        from datetime import datetime
+        # (memory_buffer 가 tool registry 를 import 하므로 여기서 import)
+        from tools.memory_buffer import get_memory_write_buffer
+        buffer = get_memory_write_buffer()
         
-        # 고유 ID 생성
-        memory_id = f"mem_{datetime.now().timestamp()}"
+        if input.flush:
+            # 앞서 쌓인 메모리까지 먼저 저장한 뒤 이 항목은 동기 저장 → id 또는 오류를 그대로 반환
+            buffer.flush()
+            result = write_memory_batch(WriteMemoryBatchInput(items=[input]))
+            if "error" in result:
+                return result
+            return {
+                "status": "saved",
+                "memory_id": result["memory_ids"][0],
+                "content": input.content,
+                "memory_type": input.memory_type
+            }
         
-        # 메타데이터
-        metadata = {
-            "memory_type": input.memory_type,
-            "importance": input.importance,
-            "tags": ",".join(input.tags),  # ChromaDB는 list 지원 안 함
-            "created_at": datetime.now().isoformat()
+        # write-behind buffer 에 넣으면 모아서 write_memory_batch 로 한 번에 저장
+        buffer.add(input.model_dump())
+        
+        return {
+            "status": "queued",
+            "content": input.content,
+            "memory_type": input.memory_type
         }
+    except Exception as e:
+        return {"error": str(e)}
+    
+def _memory_metadata(item: WriteMemoryInput, now: datetime) -> Dict[str, Any]:
+    return _lean_metadata({
+        "memory_type": item.memory_type,
+        "importance": item.importance,
+        **_encode_tags(item.tags),
+        "created_at": now.isoformat()
+    })
+
+def upsert_memory(memory_id: str, item: WriteMemoryInput) -> None:
+    """같은 id 의 메모리를 덮어쓰기 (thread 요약처럼 계속 갱신되는 기억용)"""
+    _memory_collection().upsert(
+        ids=[memory_id],
+        documents=[item.content],
+        metadatas=[_memory_metadata(item, datetime.now(tz=tz.UTC))]
+    )
+    _invalidate_memory_cache()
+
+class WriteMemoryBatchInput(BaseModel):
+    items: List[WriteMemoryInput] = Field(..., min_length=1, description="저장할 메모리 목록")
+
+def write_memory_batch(input: WriteMemoryBatchInput) -> Dict[str, Any]:
+    try:
+        now = datetime.now(tz=tz.UTC)
+        
+        # 고유 ID 생성 (같은 시각이므로 순번으로 구분)
+        ids = [f"mem_{now.timestamp()}_{next(_memory_seq)}" for _ in input.items]
         
-        # 저장
-        memory_collection.add(
-            documents=[input.content],
-            metadatas=[metadata],
-            ids=[memory_id]
+        metadatas = [_memory_metadata(item, now) for item in input.items]
+        
+        # 한 번에 저장 (임베딩도 documents 전체를 한 번에 계산)
+        _memory_collection().add(
+            documents=[item.content for item in input.items],
+            metadatas=metadatas,
+            ids=ids
         )
+        _invalidate_memory_cache()
         
         return {
             "status": "saved",
-            "memory_id": memory_id,
-            "content": input.content,
-            "memory_type": input.memory_type
+            "memory_ids": ids,
+            "count": len(ids)
         }
     except Exception as e:
         return {"error": str(e)}
+    
+def _epoch(created_at: Optional[str]) -> float:
+    if not created_at:
+        return 0.0
+    try:
+        return datetime.fromisoformat(created_at).timestamp()
+    except ValueError:
+        return 0.0
+
+def cleanup_memories(max_count: int = 500):
+    """오래되고 중요도 낮은 메모리 정리"""
+    memory_collection = _memory_collection()
+    if memory_collection.count() <= max_count:
+        return  # 정리 필요 없음 (전체 로드 없이 종료)
+    
+    all_data = memory_collection.get(include=["metadatas"])
+    ids = all_data["ids"]
+    metadatas = all_data["metadatas"]
+    
+    to_delete = len(ids) - max_count
+    if to_delete <= 0:
+        return
+    
+    # importance / created_at(epoch) 를 숫자 배열로 한 번만 변환
+    n = len(metadatas)
+    imp = np.fromiter((meta.get("importance", 3) for meta in metadatas), dtype=np.int16, count=n)
+    ts = np.fromiter((_epoch(meta.get("created_at")) for meta in metadatas), dtype=np.float64, count=n)
+    
+    # 복합 키 (중요도 낮고 오래된 순) -> 정렬 없이 삭제 대상 to_delete개만 부분 선택
+    key = imp.astype(np.int64) * (10 ** 12) + ts.astype(np.int64)
+    drop = np.argpartition(key, to_delete - 1)[:to_delete]
+    
+    # 읽어온 레코드만 id 로 삭제 (where 필터는 get() 이후 새로 저장된 메모리까지 지울 수 있음)
+    memory_collection.delete(ids=[ids[i] for i in drop])
+    _invalidate_memory_cache()
+    print(f"[Memory Cleanup] {to_delete}개 삭제됨")
 
 # Tool Spec
 # -----------------
@@ -227,9 +618,14 @@ class ToolSpec(BaseModel):
     input_model: Type[BaseModel]
     handler: Callable[[Any], Dict[str, Any]]
 
+@functools.lru_cache(maxsize=None)
+def _tool_schema(input_model: Type[BaseModel]) -> Dict[str, Any]:
+    # ToolSpec 은 hash 불가 -> 입력 모델 클래스 단위로 JSON Schema 캐시
+    return input_model.model_json_schema()
+
 def as_openai_tool_spec(spec: ToolSpec) -> Dict[str, Any]:
     """Return OpenAI tools[] spec for function calling (JSON Schema)."""
-    schema = spec.input_model.model_json_schema()
+    schema = _tool_schema(spec.input_model)
     return {
         "type": "function",
         "function": {
@@ -239,8 +635,9 @@ def as_openai_tool_spec(spec: ToolSpec) -> Dict[str, Any]:
         },
     }
 
-def get_default_tool_specs() -> list[ToolSpec]:
-    return [
+@functools.lru_cache(maxsize=1)
+def _build_default_tool_specs() -> tuple[ToolSpec, ...]:
+    return (
         ToolSpec(
             name="get_time",
             description="Get the current time in a specified timezone.",
@@ -277,4 +674,14 @@ def get_default_tool_specs() -> list[ToolSpec]:
             input_model=WriteMemoryInput,
             handler=lambda args: write_memory(WriteMemoryInput(**args)),
         ),
-    ]
\ No newline at end of file
+        ToolSpec(
+            name="write_memory_batch",
+            description="여러 개의 정보를 한 번에 메모리에 저장합니다. 저장할 항목이 여러 개일 때 write_memory 대신 사용.",
+            input_model=WriteMemoryBatchInput,
+            handler=lambda args: write_memory_batch(WriteMemoryBatchInput(**args)),
+        ),
+    )
+
+def get_default_tool_specs() -> list[ToolSpec]:
+    # 스펙은 한 번만 생성, 호출자가 리스트를 수정해도 캐시는 그대로
+    return list(_build_default_tool_specs())
\ No newline at end of file
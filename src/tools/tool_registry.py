@@ -1,8 +1,15 @@
 from __future__ import annotations
-from typing import Dict, Callable, Any, Tuple
+from typing import Dict, Callable, Any, Tuple, List, Optional
 from pydantic import ValidationError
-from tool_definitions import ToolSpec, get_default_tool_specs, as_openai_tool_spec
+from tools.tool_definitions import ToolSpec, get_default_tool_specs, as_openai_tool_spec
+from tools.singleton import lazy_singleton
+import asyncio
 import json
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# 모든 agent가 같이 쓰는 tool 실행 스레드 풀 (한 턴의 독립적인 tool 호출을 병렬 실행)
+TOOL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool")
 
 
 class ToolRegistry:
@@ -10,11 +17,19 @@ class ToolRegistry:
 
     def __init__(self):
         self._tools: Dict[str, ToolSpec] = {}
+        # name -> handler (call()에서 dict lookup 한 번으로 dispatch)
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        # 등록 후에는 바뀌지 않으므로 스펙 직렬화 결과를 캐시
+        self._openai_tools_cache: Optional[List[Dict[str, Any]]] = None
+        self._prompt_specs_cache: Optional[str] = None
 
     def register_tool(self, spec: ToolSpec) -> None:
         if spec.name in self._tools:
             raise ValueError(f"Tool already registered: {spec.name}")
         self._tools[spec.name] = spec
+        self._handlers[spec.name] = spec.handler
+        self._openai_tools_cache = None
+        self._prompt_specs_cache = None
 
     def get(self, name: str) -> ToolSpec:
         if name not in self._tools:
@@ -23,27 +38,44 @@ class ToolRegistry:
 
     def list_openai_tools(self):
         """Return OpenAI-compatible tools[] array."""
-        return [as_openai_tool_spec(spec) for spec in self._tools.values()]
+        if self._openai_tools_cache is None:
+            self._openai_tools_cache = [as_openai_tool_spec(spec) for spec in self._tools.values()]
+        return self._openai_tools_cache
 
     def call(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
-        spec = self.get(name)
+        handler = self._handlers.get(name)
+        if handler is None:
+            return {"error": "unknown_tool", "details": f"Unknown tool: {name}"}
         try:
-            return spec.handler(args)
-        except ValidationError as ve:
-            # normalize pydantic errors
-            return {"error": "validation_error", "details": ve.errors()}
+            return handler(args)
         except Exception as e:
+            if isinstance(e, ValidationError):
+                # normalize pydantic errors
+                return {"error": "validation_error", "details": e.errors()}
             return {"error": "runtime_error", "details": str(e)}
         
+    def submit(self, name: str, args: Dict[str, Any]) -> Future:
+        """Run call(name, args) on the shared tool pool."""
+        return TOOL_POOL.submit(self.call, name, args)
+
+    async def run_tool(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Async call(name, args) on the shared tool pool (for asyncio.gather)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(TOOL_POOL, self.call, name, args)
+
     def specs_for_prompt(self) -> str:
         """Return tool specs formatted for inclusion in a prompt."""
-        lines = []
-        for t in self._tools.values():
-            schema = t.input_model.model_json_schema()["properties"]
-            lines.append(f"- {t.name}: {t.description}\n  params: {json.dumps(schema, ensure_ascii=False)}")
-        return "\n".join(lines)
+        if self._prompt_specs_cache is None:
+            lines = []
+            for t in self._tools.values():
+                schema = t.input_model.model_json_schema()["properties"]
+                lines.append(f"- {t.name}: {t.description}\n  params: {json.dumps(schema, ensure_ascii=False)}")
+            self._prompt_specs_cache = "\n".join(lines)
+        return self._prompt_specs_cache
 
-def register_default_tools() -> ToolRegistry:  
+@lazy_singleton
+def register_default_tools() -> ToolRegistry:
+    """Return the shared default registry (built once per process)."""
     reg = ToolRegistry()
     for spec in get_default_tool_specs():
         reg.register_tool(spec)
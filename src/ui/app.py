@@ -1,18 +1,9 @@
-import sys
-from pathlib import Path
 import uuid
 
-project_root = Path(__file__).resolve().parent.parent.parent
-lang_graph_path = project_root / "src" / "lang_graph"
-tools_path = project_root / "src" / "tools"
-
-sys.path.insert(0, str(lang_graph_path))
-sys.path.insert(0, str(tools_path))
-
 import gradio as gr
 from langgraph.types import Command
-from graph import create_graph
-from memory import extract_and_save_memory
+from lang_graph.graph import create_graph
+from lang_graph.memory import memory_batcher
 
 # 그래프 전역
 graph = create_graph()
@@ -46,9 +37,18 @@ def chat(message: str, history: list, request: gr.Request):
     
     try:
         while True:
-            for event in graph.stream(initial_state, config, stream_mode="updates"):
+            partial_answer = ""
+            
+            for mode, event in graph.stream(initial_state, config, stream_mode=["updates", "custom"]):
+                # LLM 답변 토큰 (llm_node가 stream으로 흘려보냄)
+                if mode == "custom":
+                    partial_answer += event.get("token", "")
+                    yield partial_answer
+                    continue
+                
                 for node_name, value in event.items():
                     if node_name == "llm":
+                        partial_answer = ""
                         msgs = value.get("messages", [])
                         for m in msgs:
                             if isinstance(m, dict) and m.get("tool_calls"):
@@ -84,13 +84,13 @@ def chat(message: str, history: list, request: gr.Request):
                     final_answer = last_msg.content
                 elif isinstance(last_msg, dict):
                     final_answer = last_msg.get("content", "")
-                if final_answer:
-                    yield final_answer
         
         if not final_answer:
             yield "❌ 응답을 받지 못했습니다."
         else:
-            extract_and_save_memory(message, final_answer)
+            # Reflection은 백그라운드로 넘기고 바로 응답 종료
+            memory_batcher.add(message, final_answer)
+            yield final_answer
             
     except Exception as e:
         print(f"[ERROR] {e}")
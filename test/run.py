@@ -1,18 +1,12 @@
 #Not Use Langgraph Version
 
-import sys
-from pathlib import Path
-
-tools_path = Path(__file__).resolve().parent.parent / "src" / "tools"
-sys.path.insert(0, str(tools_path))
-
 import os
 import json
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
 from openai import OpenAI
-from tool_registry import register_default_tools
+from tools.tool_registry import register_default_tools
 
 load_dotenv()
 
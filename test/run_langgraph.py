@@ -1,17 +1,6 @@
-import sys
-from pathlib import Path
-
-# 경로 설정 (test 폴더 기준)
-project_root = Path(__file__).resolve().parent.parent
-lang_graph_path = project_root / "src" / "lang_graph"
-tools_path = project_root / "src" / "tools"
-
-sys.path.insert(0, str(lang_graph_path))
-sys.path.insert(0, str(tools_path))
-
 from langgraph.types import Command
-from graph import create_graph
-from memory import extract_and_save_memory
+from lang_graph.graph import create_graph
+from lang_graph.memory import extract_and_save_memory
 
 # ===================
 # 실행 함수 (Stream 사용)